@@ -0,0 +1,434 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Employee, DEFAULT_TENANT
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# Above this many designations needing new percentiles, one grouped pass
+# over all salaries beats a masked pass per designation
+GROUPED_RECOMPUTE_THRESHOLD = 4
+
+# updated_at is stored as integer microseconds; missing values compare lowest
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+Fingerprint = Tuple[int, Optional[int], int]
+
+
+def _timestamp(value: Optional[datetime]) -> int:
+    if value is None:
+        return NO_TIMESTAMP
+    return int(np.datetime64(value, "us").astype(np.int64))
+
+
+def get_employee_fingerprint(db: Session, tenant_id: str) -> Fingerprint:
+    """(row count, max id, max updated_at) of a tenant's employees.
+
+    Any insert raises max(id) or max(updated_at), an ORM update bumps
+    updated_at, and a hard delete lowers the count, so a change made by
+    any worker changes the fingerprint. It is read-only: writers keep no
+    shared counter. Each aggregate is its own subquery so the tenant-leading
+    indexes serve it; a single SELECT of all three scans the table.
+    """
+    in_tenant = Employee.tenant_id == tenant_id
+    count, max_id, max_updated = db.execute(
+        select(
+            select(func.count()).select_from(Employee).where(in_tenant).scalar_subquery(),
+            select(func.max(Employee.id)).where(in_tenant).scalar_subquery(),
+            select(func.max(Employee.updated_at)).where(in_tenant).scalar_subquery(),
+        )
+    ).one()
+    return count, max_id, _timestamp(max_updated)
+
+
+class SalarySnapshot:
+    """In-memory columnar copy of employee salaries.
+
+    Columns live in NumPy arrays so analytics never iterate ORM objects.
+    The routes import this module on first use to keep NumPy off the
+    startup path. There is one snapshot per tenant, see
+    get_salary_snapshot().
+
+    Writes in this process patch the snapshot through upsert(),
+    deactivate() and remove(). Writes made by other workers are found by
+    ensure_current(), which compares get_employee_fingerprint() with the
+    same fingerprint computed from the snapshot's own columns and reloads
+    when they differ. The fingerprint needs a count over the tenant's
+    rows, so it is checked at most once per
+    ANALYTICS_STALENESS_CHECK_INTERVAL seconds; other workers' writes can
+    take that long to show up. updated_at comes from each worker's clock,
+    so workers on different hosts need synchronized clocks.
+
+    Per-designation counts and payroll are kept up to date on every patch.
+    Percentile bands are cached per designation and recomputed only for the
+    designations a write touched.
+    """
+
+    def __init__(self, tenant_id: str = DEFAULT_TENANT):
+        self.tenant_id = tenant_id
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._checked_at = 0.0
+        # Counts patches, so a reload can tell one raced it
+        self._patches = 0
+        self._reset(0)
+
+    # ----------------------------
+    # Loading
+    # ----------------------------
+    def ensure_current(self, db: Session) -> None:
+        interval = settings.ANALYTICS_STALENESS_CHECK_INTERVAL
+        if self._loaded and time.monotonic() - self._checked_at < interval:
+            return
+
+        checked_at = time.monotonic()
+        fingerprint = get_employee_fingerprint(db, self.tenant_id)
+        with self._lock:
+            if self._loaded and fingerprint == self._fingerprint():
+                self._checked_at = checked_at
+                return
+
+        # One reload at a time; queries keep answering from the old columns
+        # until the new ones are swapped in
+        with self._load_lock:
+            if self._loaded and self._checked_at >= checked_at:
+                # Another thread reloaded while this one waited
+                return
+            patches = self._patches
+            columns = self._fetch(db)
+            with self._lock:
+                self._install(*columns)
+                # A write patched into the old columns during the fetch may
+                # be missing from the new ones; check again next time
+                self._checked_at = checked_at if self._patches == patches else 0.0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._reset(0)
+
+    def _fingerprint(self) -> Fingerprint:
+        if not self._size:
+            return 0, None, NO_TIMESTAMP
+        return (
+            self._size,
+            int(self._ids[:self._size].max()),
+            int(self._updated[:self._size].max()),
+        )
+
+    def _fetch(self, db: Session) -> tuple:
+        result = db.connection().execute(
+            select(
+                Employee.id,
+                Employee.salary,
+                Employee.designation,
+                Employee.is_active,
+                # As ISO text: NumPy parses strings far faster than it
+                # converts the datetime objects some drivers return
+                cast(Employee.updated_at, String),
+            ).where(Employee.tenant_id == self.tenant_id)
+        )
+        # Read plain tuples from the DBAPI cursor; building a Row per
+        # employee costs several times the fetch itself
+        rows = result.cursor.fetchall()
+        result.close()
+
+        if not rows:
+            return np.empty((0, 5), dtype=object), [], {}
+        table = np.array(rows, dtype=object)
+        # Factorize through a dict; np.unique sorts every string and is
+        # an order of magnitude slower on object arrays
+        designation_codes: Dict[str, int] = {}
+        codes = np.fromiter(
+            (designation_codes.setdefault(name, len(designation_codes)) for name in table[:, 2]),
+            dtype=np.int32,
+            count=len(table),
+        )
+        table[:, 2] = codes
+        return table, list(designation_codes), designation_codes
+
+    def _install(self, table, designations: List[str], designation_codes: Dict[str, int]) -> None:
+        size = len(table)
+        self._reset(size)
+        if size:
+            self._ids[:size] = table[:, 0].astype(np.int64)
+            self._salaries[:size] = table[:, 1].astype(np.float64)
+            self._codes[:size] = table[:, 2].astype(np.int32)
+            self._active[:size] = table[:, 3].astype(bool)
+            # NULL becomes NaT, the lowest int64
+            self._updated[:size] = table[:, 4].astype("datetime64[us]").view(np.int64)
+            self._positions = dict(zip(self._ids[:size].tolist(), range(size)))
+            self._designations = designations
+            self._designation_codes = designation_codes
+            self._size = size
+
+        self._recount()
+        self._loaded = True
+
+    def _reset(self, capacity: int) -> None:
+        capacity = max(capacity, 16)
+        self._size = 0
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._salaries = np.empty(capacity, dtype=np.float64)
+        self._codes = np.empty(capacity, dtype=np.int32)
+        self._active = np.empty(capacity, dtype=bool)
+        self._updated = np.empty(capacity, dtype=np.int64)
+        self._positions: Dict[int, int] = {}
+        self._designations: List[str] = []
+        self._designation_codes: Dict[str, int] = {}
+        # Keyed by include_inactive
+        self._counts = {True: np.zeros(0, dtype=np.int64), False: np.zeros(0, dtype=np.int64)}
+        self._payroll = {True: np.zeros(0), False: np.zeros(0)}
+        self._bands: Dict[bool, Dict[int, list]] = {True: {}, False: {}}
+
+    def _recount(self) -> None:
+        salaries = self._salaries[:self._size]
+        codes = self._codes[:self._size]
+        active = self._active[:self._size]
+        length = len(self._designations)
+        for include_inactive, mask in ((True, None), (False, active)):
+            weights = salaries if mask is None else np.where(mask, salaries, 0.0)
+            self._counts[include_inactive] = np.bincount(
+                codes, weights=None if mask is None else mask, minlength=length
+            ).astype(np.int64)
+            self._payroll[include_inactive] = np.bincount(codes, weights=weights, minlength=length)
+            self._bands[include_inactive] = {}
+
+    def _code_for(self, designation: str) -> int:
+        code = self._designation_codes.get(designation)
+        if code is None:
+            code = len(self._designations)
+            self._designations.append(designation)
+            self._designation_codes[designation] = code
+        return code
+
+    # ----------------------------
+    # Incremental updates
+    # ----------------------------
+    def upsert(
+        self,
+        employee_id: int,
+        salary: float,
+        designation: str,
+        is_active: bool,
+        updated_at: Optional[datetime],
+    ) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            self._patches += 1
+            position = self._positions.get(employee_id)
+            if position is None:
+                position = self._append(employee_id)
+            else:
+                self._contribute(position, -1)
+            self._salaries[position] = salary
+            self._codes[position] = self._code_for(designation)
+            self._active[position] = bool(is_active)
+            self._updated[position] = _timestamp(updated_at)
+            self._contribute(position, 1)
+
+    def deactivate(self, employee_id: int, updated_at: Optional[datetime]) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            position = self._positions.get(employee_id)
+            if position is None:
+                return
+            self._patches += 1
+            self._contribute(position, -1)
+            self._active[position] = False
+            self._updated[position] = _timestamp(updated_at)
+            self._contribute(position, 1)
+
+    def remove(self, employee_id: int) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            position = self._positions.pop(employee_id, None)
+            if position is None:
+                return
+            self._patches += 1
+            self._contribute(position, -1)
+            # Swap the last row into the freed slot to keep columns dense
+            last = self._size - 1
+            if position != last:
+                moved_id = int(self._ids[last])
+                self._ids[position] = self._ids[last]
+                self._salaries[position] = self._salaries[last]
+                self._codes[position] = self._codes[last]
+                self._active[position] = self._active[last]
+                self._updated[position] = self._updated[last]
+                self._positions[moved_id] = position
+            self._size = last
+
+    def _append(self, employee_id: int) -> int:
+        if self._size == len(self._ids):
+            capacity = len(self._ids) * 2
+            self._ids = np.resize(self._ids, capacity)
+            self._salaries = np.resize(self._salaries, capacity)
+            self._codes = np.resize(self._codes, capacity)
+            self._active = np.resize(self._active, capacity)
+            self._updated = np.resize(self._updated, capacity)
+        position = self._size
+        self._ids[position] = employee_id
+        self._salaries[position] = 0.0
+        self._codes[position] = 0
+        self._active[position] = False
+        self._updated[position] = NO_TIMESTAMP
+        self._positions[employee_id] = position
+        self._size += 1
+        return position
+
+    def _contribute(self, position: int, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one row from the per-designation totals"""
+        code = int(self._codes[position])
+        salary = float(self._salaries[position])
+        grow = len(self._designations) - len(self._counts[True])
+        for include_inactive in (True, False):
+            if grow > 0:
+                # New designation since the last recount
+                self._counts[include_inactive] = np.concatenate(
+                    (self._counts[include_inactive], np.zeros(grow, dtype=np.int64))
+                )
+                self._payroll[include_inactive] = np.concatenate(
+                    (self._payroll[include_inactive], np.zeros(grow))
+                )
+            if not include_inactive and not self._active[position]:
+                continue
+            self._counts[include_inactive][code] += sign
+            self._payroll[include_inactive][code] += sign * salary
+            self._bands[include_inactive].pop(code, None)
+
+    # ----------------------------
+    # Analytics
+    # ----------------------------
+    def summary(
+        self,
+        bins: int = 10,
+        include_inactive: bool = False,
+        raises: Optional[Dict[str, float]] = None,
+    ) -> dict:
+        with self._lock:
+            return self._summary(bins, include_inactive, raises)
+
+    def _summary(self, bins: int, include_inactive: bool, raises: Optional[Dict[str, float]]) -> dict:
+        salaries = self._salaries[:self._size]
+        codes = self._codes[:self._size]
+        if not include_inactive:
+            mask = self._active[:self._size]
+            salaries = salaries[mask]
+            codes = codes[mask]
+
+        names = list(self._designations)
+        counts = self._counts[include_inactive]
+        payroll = self._payroll[include_inactive]
+        bands = self._percentile_bands(include_inactive, salaries, codes)
+
+        if len(salaries):
+            hist_counts, edges = np.histogram(salaries, bins=bins)
+        else:
+            hist_counts, edges = np.zeros(bins, dtype=np.int64), np.zeros(bins + 1)
+
+        designations = []
+        for code, name in enumerate(names):
+            count = int(counts[code])
+            if count == 0:
+                continue
+            designations.append({
+                "designation": name,
+                "count": count,
+                "payroll": float(payroll[code]),
+                "mean": float(payroll[code] / count),
+                "percentiles": {f"p{p}": v for p, v in zip(PERCENTILES, bands[code])},
+            })
+
+        result = {
+            "total_employees": int(len(salaries)),
+            "payroll_total": float(payroll.sum()),
+            "histogram": {
+                "edges": edges.tolist(),
+                "counts": hist_counts.tolist(),
+            },
+            "designations": designations,
+            "raise_simulation": None,
+        }
+
+        if raises:
+            result["raise_simulation"] = self._simulate_raises(names, counts, payroll, raises)
+
+        return result
+
+    def _percentile_bands(self, include_inactive: bool, salaries, codes) -> Dict[int, list]:
+        """Return cached bands, recomputing only designations a write touched"""
+        cached = self._bands[include_inactive]
+        counts = self._counts[include_inactive]
+        missing = [
+            code for code in range(len(counts))
+            if counts[code] > 0 and code not in cached
+        ]
+
+        if len(missing) > GROUPED_RECOMPUTE_THRESHOLD:
+            # A stable sort on small integer codes is a radix sort, which
+            # makes each designation a contiguous slice without sorting salaries
+            sort_codes = codes.astype(np.int16) if len(counts) <= np.iinfo(np.int16).max else codes
+            grouped = salaries[np.argsort(sort_codes, kind="stable")]
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            for code in missing:
+                group = grouped[starts[code]:starts[code] + counts[code]]
+                cached[code] = np.percentile(group, PERCENTILES).tolist()
+        else:
+            for code in missing:
+                cached[code] = np.percentile(salaries[codes == code], PERCENTILES).tolist()
+
+        return cached
+
+    def _simulate_raises(self, names: List[str], counts, payroll, raises: Dict[str, float]) -> dict:
+        percent = np.array([raises.get(name, 0.0) for name in names], dtype=np.float64)
+        after = payroll * (1 + percent / 100)
+
+        return {
+            "payroll_before": float(payroll.sum()),
+            "payroll_after": float(after.sum()),
+            "delta": float(after.sum() - payroll.sum()),
+            "by_designation": [
+                {
+                    "designation": name,
+                    "percent": float(percent[code]),
+                    "payroll_before": float(payroll[code]),
+                    "payroll_after": float(after[code]),
+                }
+                for code, name in enumerate(names)
+                if name in raises and counts[code] > 0
+            ],
+        }
+
+
+_snapshots: Dict[str, SalarySnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_salary_snapshot(tenant_id: str) -> SalarySnapshot:
+    snapshot = _snapshots.get(tenant_id)
+    if snapshot is None:
+        with _snapshots_lock:
+            snapshot = _snapshots.setdefault(tenant_id, SalarySnapshot(tenant_id))
+    return snapshot
+
+
+def find_salary_snapshot(tenant_id: str) -> Optional[SalarySnapshot]:
+    """Return the tenant's snapshot if one has been created, without creating it"""
+    return _snapshots.get(tenant_id)
+
+
+def invalidate_snapshots() -> None:
+    with _snapshots_lock:
+        _snapshots.clear()
@@ -0,0 +1,310 @@
+"""
+Asynchronous employee audit log.
+
+Session events capture before/after diffs of Employee rows while a
+request flushes. The diffs are held on the session until it commits, then
+handed to a bounded in-memory queue. A background thread writes the queue
+to ``audit_logs`` in multi-row INSERTs, so requests never wait on the
+audit write.
+
+When the queue is full, or the database rejects a batch, events are
+appended to a per-process spill file and fsynced before the call returns.
+Spill files are replayed once the queue has drained. Files left behind by
+processes that have died are claimed by an atomic rename, so only one
+worker replays each. Replay is at-least-once: a crash mid-replay can write
+a batch twice.
+"""
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models import AuditLog, Employee
+
+logger = logging.getLogger(__name__)
+
+# session.info keys
+ACTOR_KEY = "audit_actor"
+PENDING_KEY = "audit_pending"
+
+IGNORED_FIELDS = {"updated_at"}
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _make_event(session: Session, action: str, tenant_id: str, employee_id: int, changes: dict) -> dict:
+    return {
+        "tenant_id": tenant_id,
+        "employee_id": employee_id,
+        "actor": session.info.get(ACTOR_KEY),
+        "action": action,
+        "changes": json.dumps(changes),
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _pending(session: Session) -> list:
+    return session.info.setdefault(PENDING_KEY, [])
+
+
+def _snapshot(employee: Employee, before: bool) -> dict:
+    changes = {}
+    for attr in inspect(employee).attrs:
+        if attr.key in IGNORED_FIELDS:
+            continue
+        value = _json_value(attr.value)
+        changes[attr.key] = [value, None] if before else [None, value]
+    return changes
+
+
+def record_insert(session: Session, employee: dict) -> None:
+    """Record a create made with a Core INSERT, which never reaches the flush events"""
+    changes = {
+        key: [None, _json_value(value)]
+        for key, value in employee.items()
+        if key not in IGNORED_FIELDS
+    }
+    _pending(session).append(
+        _make_event(session, "create", employee["tenant_id"], employee["id"], changes)
+    )
+
+
+# ----------------------------
+# Session events
+# ----------------------------
+@event.listens_for(Session, "before_flush")
+def _capture_changes(session, flush_context, instances):
+    for obj in session.dirty:
+        if not isinstance(obj, Employee):
+            continue
+        changes = {}
+        for attr in inspect(obj).attrs:
+            if attr.key in IGNORED_FIELDS:
+                continue
+            history = attr.history
+            if not history.has_changes():
+                continue
+            before = _json_value(history.deleted[0]) if history.deleted else None
+            after = _json_value(history.added[0]) if history.added else None
+            if before != after:
+                changes[attr.key] = [before, after]
+        if changes:
+            _pending(session).append(
+                _make_event(session, "update", obj.tenant_id, obj.id, changes)
+            )
+
+    for obj in session.deleted:
+        if isinstance(obj, Employee):
+            _pending(session).append(
+                _make_event(session, "delete", obj.tenant_id, obj.id, _snapshot(obj, before=True))
+            )
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_inserts(session, flush_context):
+    # New rows only have their primary key once the flush has run
+    for obj in session.new:
+        if isinstance(obj, Employee):
+            _pending(session).append(
+                _make_event(session, "create", obj.tenant_id, obj.id, _snapshot(obj, before=False))
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session):
+    for audit_event in session.info.pop(PENDING_KEY, []):
+        audit_writer.enqueue(audit_event)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+# ----------------------------
+# Background writer
+# ----------------------------
+class AuditWriter:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_queue: int = settings.AUDIT_QUEUE_SIZE,
+        batch_size: int = settings.AUDIT_BATCH_SIZE,
+        flush_interval: float = settings.AUDIT_FLUSH_INTERVAL,
+        spill_dir: str = settings.AUDIT_SPILL_DIR,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def spill_path(self) -> str:
+        # Read at call time so forked workers each get their own file
+        return os.path.join(self.spill_dir, f"audit_spill.{os.getpid()}.jsonl")
+
+    def enqueue(self, audit_event: dict) -> None:
+        try:
+            self.queue.put_nowait(audit_event)
+        except queue.Full:
+            self._spill([audit_event])
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> None:
+        """Synchronously write everything queued or spilled by this process"""
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                break
+            self._write_or_spill(batch)
+        self._drain_spills()
+
+    def _run(self) -> None:
+        orphans = self._orphaned_spills()
+        while not self._stop.is_set():
+            try:
+                if orphans is not None:
+                    self._drain_spills(orphans)
+                    orphans = None
+                batch = self._take_batch(block=True)
+                if batch:
+                    self._write_or_spill(batch)
+                if self.queue.empty():
+                    self._drain_spills()
+            except Exception:
+                # Anything unexpected must not kill the thread, or every
+                # later event would sit in the queue until shutdown
+                logger.exception("Audit writer iteration failed")
+                self._stop.wait(self.flush_interval)
+
+    def _take_batch(self, block: bool) -> List[dict]:
+        batch = []
+        try:
+            if block:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch: List[dict]) -> None:
+        rows = [
+            {**audit_event, "created_at": datetime.fromisoformat(audit_event["created_at"])}
+            for audit_event in batch
+        ]
+        with self._write_lock, self.session_factory() as db:
+            db.execute(insert(AuditLog.__table__).values(rows))
+            db.commit()
+
+    def _write_or_spill(self, batch: List[dict]) -> None:
+        try:
+            self._write(batch)
+        except SQLAlchemyError:
+            logger.exception("Audit batch write failed, spilling %d events to disk", len(batch))
+            self._spill(batch)
+
+    # ----------------------------
+    # Disk spill
+    # ----------------------------
+    def _spill(self, events: List[dict]) -> None:
+        with self._spill_lock:
+            with open(self.spill_path, "a") as f:
+                for audit_event in events:
+                    f.write(json.dumps(audit_event) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _orphaned_spills(self) -> List[str]:
+        """Spill files, claimed or not, whose owning process has died"""
+        orphans = []
+        for path in glob.glob(os.path.join(self.spill_dir, "audit_spill.*")):
+            try:
+                pid = int(os.path.basename(path).split(".")[1])
+            except (IndexError, ValueError):
+                continue
+            if pid == os.getpid():
+                continue
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                orphans.append(path)
+            except PermissionError:
+                pass
+        return orphans
+
+    def _claim(self, path: str) -> None:
+        """Rename a spill file to a name carrying this process's pid.
+
+        The rename is atomic, so when several workers find the same orphan
+        exactly one of them gets it. A claimed file whose claimer dies is
+        an orphan again.
+        """
+        claimed = os.path.join(
+            self.spill_dir, f"audit_spill.{os.getpid()}.{uuid.uuid4().hex}.draining"
+        )
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            # Another worker claimed it first, or nothing was spilled
+            pass
+
+    def _drain_spills(self, orphans: List[str] = ()) -> None:
+        with self._spill_lock:
+            self._claim(self.spill_path)
+        for path in orphans:
+            self._claim(path)
+
+        # Includes files left over from an earlier failed replay
+        pattern = os.path.join(self.spill_dir, f"audit_spill.{os.getpid()}.*.draining")
+        for claimed in glob.glob(pattern):
+            events = []
+            with open(claimed) as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Torn final line from a crash mid-append
+                        continue
+
+            try:
+                for start in range(0, len(events), self.batch_size):
+                    self._write(events[start:start + self.batch_size])
+            except SQLAlchemyError:
+                logger.exception("Audit spill replay failed, will retry")
+                return
+            os.remove(claimed)
+
+
+audit_writer = AuditWriter()
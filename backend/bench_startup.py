@@ -0,0 +1,67 @@
+"""
+Benchmark application cold start.
+
+Times fresh interpreter imports of main.py plus the lifespan startup
+(schema version check), then prints a ``python -X importtime`` breakdown
+of the slowest modules by cumulative import time.
+
+Usage:
+    python bench_startup.py [RUNS] [TOP]
+"""
+import subprocess
+import sys
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+TOP = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+
+STARTUP_SNIPPET = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from migrations import ensure_schema
+ensure_schema()
+ready = time.perf_counter()
+print(f"{imported - start:.4f} {ready - imported:.4f}")
+"""
+
+
+def time_startup():
+    import_times, schema_times = [], []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SNIPPET],
+            capture_output=True, text=True, check=True
+        ).stdout.split()[-2:]
+        import_times.append(float(output[0]))
+        schema_times.append(float(output[1]))
+
+    print(f"Cold start over {RUNS} runs (best / median):")
+    for label, samples in (("import main", import_times), ("schema check", schema_times)):
+        samples.sort()
+        print(f"  {label:<14} {samples[0] * 1000:8.1f} ms  {samples[len(samples) // 2] * 1000:8.1f} ms")
+
+
+def importtime_report():
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, check=True
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+
+    rows.sort(reverse=True)
+    print(f"\nTop {TOP} imports by cumulative time (python -X importtime):")
+    print(f"  {'cumulative':>10} {'self':>8}  module")
+    for cumulative_us, self_us, module in rows[:TOP]:
+        print(f"  {cumulative_us / 1000:8.1f}ms {self_us / 1000:6.1f}ms  {module}")
+
+
+if __name__ == "__main__":
+    time_startup()
+    importtime_report()
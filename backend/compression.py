@@ -0,0 +1,181 @@
+"""
+Negotiated response compression.
+
+Each request gets the supported coding with the highest q-value in its
+``Accept-Encoding`` header: ``br`` when the ``brotli`` package is
+installed, or ``gzip``. Brotli wins ties. Bodies smaller than
+``minimum_size`` are sent uncompressed.
+"""
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# wbits for zlib's gzip container
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def accepted_encodings(accept_encoding: str) -> dict:
+    """Parse an Accept-Encoding header into {coding: q-value}"""
+    encodings = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[coding.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(encodings: dict, supported: list):
+    """Pick the supported coding with the highest q-value, or None.
+
+    ``supported`` is in preference order, which breaks ties. Codings the
+    client did not list take the q-value of ``*``, if given.
+    """
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = encodings.get(coding, encodings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+
+    def process(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def process(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class CompressionResponder:
+    """Compress one response with the given coding.
+
+    Mirrors Starlette's GZipResponder: small single-chunk bodies and
+    responses that already set Content-Encoding pass through untouched,
+    streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, encoding: str, compressor) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoding = encoding
+        self.compressor = compressor
+        self.send: Send = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.content_encoding_set = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Hold the headers until the first body chunk shows whether
+            # the response gets compressed
+            self.initial_message = message
+            self.content_encoding_set = "content-encoding" in Headers(raw=message["headers"])
+            return
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if self.content_encoding_set or (len(body) < self.minimum_size and not more_body):
+                self.compressor = None
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                message["body"] = self.compressor.process(body) + self.compressor.flush()
+            else:
+                message["body"] = self.compressor.process(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if self.compressor is None:
+            # Passing this response through untouched
+            await self.send(message)
+            return
+
+        compressed = self.compressor.process(body)
+        compressed += self.compressor.flush() if more_body else self.compressor.finish()
+        message["body"] = compressed
+        await self.send(message)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encodings = accepted_encodings(Headers(scope=scope).get("Accept-Encoding", ""))
+            encoding = choose_encoding(encodings, self.supported)
+            if encoding is not None:
+                responder = CompressionResponder(
+                    self.app, self.minimum_size, encoding, self._compressor(encoding)
+                )
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    def _compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
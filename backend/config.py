@@ -16,6 +16,18 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Compression Settings (responses smaller than this are sent as-is)
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    
+    # Audit Log Settings (events beyond the queue size spill to disk)
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_SPILL_DIR: str = "."
+    
+    # Analytics Settings (seconds between checks for other workers' writes)
+    ANALYTICS_STALENESS_CHECK_INTERVAL: float = 1.0
+    
     # CORS Settings
     ALLOWED_ORIGINS: List[str] = [
         "http://localhost:3000",
@@ -12,9 +12,9 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Create all tables
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+# Create all tables (used by the initial migration, see migrations.py)
+def create_tables(bind=engine):
+    Base.metadata.create_all(bind=bind)
 
 # Dependency to get database session
 def get_db():
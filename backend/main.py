@@ -1,17 +1,25 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from database import create_tables
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from audit import audit_writer
+from database import get_db
+from compression import CompressionMiddleware
+from migrations import ensure_schema
 from routes import auth, employees
 from config import settings
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create database tables
-    create_tables()
-    print("Database tables created successfully")
+    # Startup: Single-query schema version check, migrating only if behind
+    version = ensure_schema()
+    print(f"Database schema at version {version}")
+    audit_writer.start()
     yield
-    # Shutdown: Cleanup if needed
+    # Shutdown: Write out any queued audit events
+    audit_writer.stop()
     print("Application shutdown")
 
 # Create FastAPI app
@@ -30,6 +38,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated brotli/gzip compression above a size threshold
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE
+)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(employees.router)
@@ -43,11 +57,19 @@ def root():
         "docs": "/docs"
     }
 
-# Health check endpoint
+# Readiness probe: healthy only when the database answers
 @app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+def health_check(db: Session = Depends(get_db)):
+    try:
+        db.execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database unavailable"
+        )
+    return {"status": "healthy", "database": "ok"}
 
 if __name__ == "__main__":
+    # Single-process development server; use serve.py for production
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000)
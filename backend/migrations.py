@@ -0,0 +1,167 @@
+"""
+Versioned schema migrations.
+
+The applied version lives in a one-row ``schema_version`` table, so the
+startup check is a single SELECT instead of reflecting every table the
+way ``Base.metadata.create_all`` does.
+
+Every worker runs that check at startup, so migrate() first takes a
+database-wide lock and re-reads the version under it: ``BEGIN IMMEDIATE``
+on SQLite, ``pg_advisory_xact_lock`` on Postgres. Processes that lose the
+race wait, then find nothing left to do.
+
+Run pending migrations explicitly with:
+    python migrations.py
+"""
+from contextlib import contextmanager
+from typing import Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from database import engine, create_tables
+from models import AuditLog, Employee, User, DEFAULT_TENANT
+
+
+def _initial_schema(connection):
+    create_tables(connection)
+
+
+def _tenant_scoping(connection):
+    # Fresh databases already get these from the current models in version
+    # 1, so every step here checks before it changes anything
+    for model in (User, Employee):
+        table = model.__tablename__
+        columns = {column["name"] for column in inspect(connection).get_columns(table)}
+        if "tenant_id" not in columns:
+            connection.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN tenant_id VARCHAR "
+                f"NOT NULL DEFAULT '{DEFAULT_TENANT}'"
+            ))
+
+        # Email uniqueness moves from global to per tenant
+        connection.execute(text(f"DROP INDEX IF EXISTS ix_{table}_email"))
+        for index in model.__table__.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+def _audit_log(connection):
+    AuditLog.__table__.create(bind=connection, checkfirst=True)
+
+
+def _employee_updated_index(connection):
+    for index in Employee.__table__.indexes:
+        if index.name == "ix_employees_tenant_updated":
+            index.create(bind=connection, checkfirst=True)
+
+
+# (version, migration) pairs, applied in order. Append new entries; never
+# edit or reorder ones that have already shipped.
+MIGRATIONS = [
+    (1, _initial_schema),
+    (2, _tenant_scoping),
+    (3, _audit_log),
+    (4, _employee_updated_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+MIGRATION_LOCK_KEY = 4_207_341
+
+
+@contextmanager
+def _locked_transaction():
+    """Yield a connection in a transaction only one process can hold at a time"""
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            # pysqlite only opens transactions before DML, so DDL would
+            # commit statement by statement; run the driver in autocommit
+            # and open the transaction ourselves. IMMEDIATE takes the
+            # write lock now, making other processes wait their turn.
+            connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.exec_driver_sql("ROLLBACK")
+                raise
+            connection.exec_driver_sql("COMMIT")
+    else:
+        with engine.begin() as connection:
+            if engine.dialect.name == "postgresql":
+                # Released when the transaction ends
+                connection.execute(
+                    text("SELECT pg_advisory_xact_lock(:key)"),
+                    {"key": MIGRATION_LOCK_KEY}
+                )
+            yield connection
+
+
+def _read_version(connection) -> Tuple[int, bool]:
+    """Return the applied version and whether schema_version has its single-row key"""
+    if not inspect(connection).has_table("schema_version"):
+        return 0, False
+    version = connection.execute(
+        text("SELECT MAX(version) FROM schema_version")
+    ).scalar() or 0
+    columns = {column["name"] for column in inspect(connection).get_columns("schema_version")}
+    return version, "id" in columns
+
+
+def _write_version(connection, version: int, keyed: bool) -> None:
+    if not keyed:
+        # Tables from before the single-row key could hold several rows
+        connection.execute(text("DROP TABLE IF EXISTS schema_version"))
+        connection.execute(text(
+            "CREATE TABLE schema_version ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), "
+            "version INTEGER NOT NULL)"
+        ))
+    connection.execute(text("DELETE FROM schema_version"))
+    connection.execute(
+        text("INSERT INTO schema_version (id, version) VALUES (1, :version)"),
+        {"version": version}
+    )
+
+
+def get_schema_version() -> int:
+    """Return the applied schema version, or 0 for an unmigrated database"""
+    with engine.connect() as connection:
+        try:
+            return connection.execute(
+                text("SELECT version FROM schema_version")
+            ).scalar() or 0
+        except (OperationalError, ProgrammingError):
+            return 0
+
+
+def migrate() -> int:
+    """Apply every pending migration in one transaction, under the migration lock"""
+    with _locked_transaction() as connection:
+        # Re-read under the lock; another process may have just migrated
+        current, keyed = _read_version(connection)
+        if current >= SCHEMA_VERSION and keyed:
+            return current
+
+        for version, migration in MIGRATIONS:
+            if version > current:
+                migration(connection)
+
+        _write_version(connection, max(current, SCHEMA_VERSION), keyed)
+
+    return max(current, SCHEMA_VERSION)
+
+
+def ensure_schema() -> int:
+    """Cheap startup check; only migrates when the database is behind"""
+    version = get_schema_version()
+    if version >= SCHEMA_VERSION:
+        return version
+    return migrate()
+
+
+if __name__ == "__main__":
+    before = get_schema_version()
+    after = migrate()
+    print(f"Schema migrated from version {before} to {after}")
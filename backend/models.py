@@ -1,16 +1,23 @@
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Index, Text
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
 Base = declarative_base()
 
+# Tenant assigned to rows and tokens created before multi-tenancy
+DEFAULT_TENANT = "default"
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_tenant_email", "tenant_id", "email", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(String, nullable=False, default=DEFAULT_TENANT)
     username = Column(String, unique=True, index=True, nullable=False)
-    email = Column(String, unique=True, index=True, nullable=False)
+    email = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="user")  # user or admin
     is_active = Column(Boolean, default=True)
@@ -19,12 +26,37 @@ class User(Base):
 
 class Employee(Base):
     __tablename__ = "employees"
+    # Every employee query is tenant-scoped, so indexes lead with tenant_id
+    __table_args__ = (
+        Index("ix_employees_tenant_email", "tenant_id", "email", unique=True),
+        Index("ix_employees_tenant_id", "tenant_id", "id"),
+        Index("ix_employees_tenant_active", "tenant_id", "is_active"),
+        # Serves max(updated_at) in the analytics staleness check
+        Index("ix_employees_tenant_updated", "tenant_id", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(String, nullable=False, default=DEFAULT_TENANT)
     name = Column(String, nullable=False)
-    email = Column(String, unique=True, index=True, nullable=False)
+    email = Column(String, nullable=False)
     designation = Column(String, nullable=False)
     salary = Column(Float, nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AuditLog(Base):
+    __tablename__ = "audit_logs"
+    # History is read per employee over a time range
+    __table_args__ = (
+        Index("ix_audit_logs_tenant_employee_created", "tenant_id", "employee_id", "created_at"),
+    )
+    
+    # No foreign key: history must outlive hard-deleted employees
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String, nullable=False, default=DEFAULT_TENANT)
+    employee_id = Column(Integer, nullable=False)
+    actor = Column(String)  # username of the user who made the change
+    action = Column(String, nullable=False)  # create, update or delete
+    changes = Column(Text, nullable=False)  # JSON {field: [before, after]}
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,21 +1,25 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 
+from audit import ACTOR_KEY
 from database import get_db
-from models import User
-from schemas import Token, UserLogin, TokenData, UserResponse
+from models import User, DEFAULT_TENANT
+from schemas import Token, UserCreate, UserLogin, TokenData, UserResponse
 from config import settings
 
 # ----------------------------
 # Password hashing
 # ----------------------------
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache()
+def get_pwd_context():
+    # Built on first use so importing this module stays cheap at startup
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # ----------------------------
 # JWT security
@@ -26,14 +30,16 @@ security = HTTPBearer()
 # Utility functions
 # ----------------------------
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
 
     expire = datetime.utcnow() + (
@@ -50,6 +56,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def verify_token(token: str) -> TokenData:
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(
             token,
@@ -58,6 +66,8 @@ def verify_token(token: str) -> TokenData:
         )
 
         username: str = payload.get("sub")
+        # Tokens issued before multi-tenancy carry no tenant claim
+        tenant_id: str = payload.get("tenant", DEFAULT_TENANT)
 
         if username is None:
             raise HTTPException(
@@ -65,7 +75,7 @@ def verify_token(token: str) -> TokenData:
                 detail="Could not validate credentials",
             )
 
-        return TokenData(username=username)
+        return TokenData(username=username, tenant_id=tenant_id)
 
     except JWTError:
         raise HTTPException(
@@ -86,7 +96,8 @@ def get_current_user(
     token_data = verify_token(token)
 
     user = db.query(User).filter(
-        User.username == token_data.username
+        User.username == token_data.username,
+        User.tenant_id == token_data.tenant_id
     ).first()
 
     if not user:
@@ -101,6 +112,9 @@ def get_current_user(
             detail="Inactive user",
         )
 
+    # Attributes audit log entries written through this session to the user
+    db.info[ACTOR_KEY] = user.username
+
     return user
 
 
@@ -132,6 +146,31 @@ router = APIRouter(
 )
 
 
+# ----------------------------
+# Register Route
+# ----------------------------
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+def register(user: UserCreate, db: Session = Depends(get_db)):
+
+    if db.query(User).filter(User.username == user.username).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already registered",
+        )
+
+    # New users join the default tenant with the default "user" role
+    db_user = User(
+        username=user.username,
+        email=user.email,
+        hashed_password=get_password_hash(user.password)
+    )
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+
+    return db_user
+
+
 # ----------------------------
 # Login Route
 # ----------------------------
@@ -152,7 +191,7 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
         )
 
     access_token = create_access_token(
-        data={"sub": db_user.username}
+        data={"sub": db_user.username, "tenant": db_user.tenant_id}
     )
 
     return {
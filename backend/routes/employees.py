@@ -1,21 +1,73 @@
+import sys
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import Optional
-from math import ceil
+from sqlalchemy import or_, insert
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
+from math import ceil, isfinite
+from datetime import datetime
+from audit import record_insert
 from database import get_db
-from models import Employee, User
+from models import AuditLog, Employee, User
 from schemas import (
+    AuditLogResponse,
     EmployeeCreate,
     EmployeeUpdate,
     EmployeeResponse,
-    PaginatedEmployeeResponse
+    PaginatedEmployeeResponse,
+    SalaryAnalyticsResponse
 )
 from .auth import get_current_user  # <-- fixed import
 
 
 router = APIRouter(prefix="/employees", tags=["Employees"])
 
+EMPLOYEE_FIELDS = list(EmployeeResponse.model_fields)
+
+def find_salary_snapshot(tenant_id: str):
+    """Return the tenant's analytics snapshot, if the analytics route has built one.
+
+    analytics (and NumPy) is only imported by the analytics route, so
+    writes made before that have no snapshot to keep current.
+    """
+    analytics = sys.modules.get("analytics")
+    if analytics is None:
+        return None
+    return analytics.find_salary_snapshot(tenant_id)
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Validate a comma-separated sparse fieldset, keeping response field order"""
+    if not fields:
+        return None
+    
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(EMPLOYEE_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    
+    return [field for field in EMPLOYEE_FIELDS if field in requested]
+
+def insert_employee(db: Session, data: dict, tenant_id: str):
+    """Insert an employee and queue its audit event; the caller commits.
+
+    A single INSERT ... RETURNING, so the (tenant_id, email) unique index
+    decides duplicates: the INSERT raises IntegrityError, which nothing
+    after it can. bench_create.py times this same function.
+    """
+    stmt = (
+        insert(Employee)
+        .values(**data, tenant_id=tenant_id)
+        .returning(*Employee.__table__.c)
+    )
+    db_employee = db.execute(stmt).mappings().one()
+    record_insert(db, db_employee)
+    return db_employee
+
 @router.post("", response_model=EmployeeResponse, status_code=status.HTTP_201_CREATED)
 def create_employee(
     employee_data: EmployeeCreate,
@@ -23,20 +75,27 @@ def create_employee(
     current_user: User = Depends(get_current_user)
 ):
     """Create a new employee"""
-    # Check if email already exists
-    if db.query(Employee).filter(Employee.email == employee_data.email).first():
+    try:
+        db_employee = insert_employee(db, employee_data.model_dump(), current_user.tenant_id)
+    except IntegrityError:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Employee with this email already exists"
         )
-    
-    # Create new employee
-    db_employee = Employee(**employee_data.model_dump())
-    db.add(db_employee)
     db.commit()
-    db.refresh(db_employee)
     
-    return db_employee
+    snapshot = find_salary_snapshot(current_user.tenant_id)
+    if snapshot:
+        snapshot.upsert(
+            db_employee["id"],
+            db_employee["salary"],
+            db_employee["designation"],
+            db_employee["is_active"],
+            db_employee["updated_at"]
+        )
+    
+    return dict(db_employee)
 
 @router.get("", response_model=PaginatedEmployeeResponse)
 def get_employees(
@@ -44,12 +103,19 @@ def get_employees(
     page_size: int = Query(10, ge=1, le=100, description="Items per page"),
     search: Optional[str] = Query(None, description="Search by name or email"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all employees with pagination and search"""
-    # Base query
-    query = db.query(Employee)
+    columns = parse_fields(fields)
+    
+    # Base query, narrowed to the requested columns for sparse fieldsets
+    if columns:
+        query = db.query(*[getattr(Employee, column) for column in columns])
+    else:
+        query = db.query(Employee)
+    query = query.filter(Employee.tenant_id == current_user.tenant_id)
     
     # Apply search filter
     if search:
@@ -72,7 +138,17 @@ def get_employees(
     skip = (page - 1) * page_size
     
     # Get paginated results
-    employees = query.offset(skip).limit(page_size).all()
+    employees = query.order_by(Employee.id).offset(skip).limit(page_size).all()
+    
+    if columns:
+        # Partial rows bypass the full response model
+        return JSONResponse(content=jsonable_encoder({
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "employees": [dict(row._mapping) for row in employees]
+        }))
     
     return {
         "total": total,
@@ -82,14 +158,63 @@ def get_employees(
         "employees": employees
     }
 
+@router.get("/analytics", response_model=SalaryAnalyticsResponse)
+def get_salary_analytics(
+    bins: int = Query(10, ge=1, le=200, description="Number of histogram bins"),
+    include_inactive: bool = Query(False, description="Include deactivated employees"),
+    raises: Optional[List[str]] = Query(
+        None,
+        description="Raise simulation per designation as 'Designation:percent'"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Salary histogram, percentile bands per designation, payroll and raise simulation"""
+    raise_map = {}
+    for item in raises or []:
+        designation, _, percent = item.rpartition(":")
+        try:
+            percent = float(percent)
+        except ValueError:
+            percent = None
+        # float() also accepts "nan" and "inf", which would poison the sums
+        if percent is None or not isfinite(percent):
+            designation = ""
+        if not designation:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid raise '{item}', expected 'Designation:percent'"
+            )
+        raise_map[designation] = percent
+    
+    from analytics import get_salary_snapshot
+    
+    snapshot = get_salary_snapshot(current_user.tenant_id)
+    snapshot.ensure_current(db)
+    return snapshot.summary(
+        bins=bins,
+        include_inactive=include_inactive,
+        raises=raise_map
+    )
+
 @router.get("/{employee_id}", response_model=EmployeeResponse)
 def get_employee(
     employee_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific employee by ID"""
-    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    columns = parse_fields(fields)
+    
+    if columns:
+        query = db.query(*[getattr(Employee, column) for column in columns])
+    else:
+        query = db.query(Employee)
+    employee = query.filter(
+        Employee.id == employee_id,
+        Employee.tenant_id == current_user.tenant_id
+    ).first()
     
     if not employee:
         raise HTTPException(
@@ -97,8 +222,33 @@ def get_employee(
             detail="Employee not found"
         )
     
+    if columns:
+        return JSONResponse(content=jsonable_encoder(dict(employee._mapping)))
+    
     return employee
 
+@router.get("/{employee_id}/audit", response_model=list[AuditLogResponse])
+def get_employee_audit_log(
+    employee_id: int,
+    since: Optional[datetime] = Query(None, description="Only changes at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only changes before this time"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum entries, newest first"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the change history of an employee (including deleted ones)"""
+    query = db.query(AuditLog).filter(
+        AuditLog.tenant_id == current_user.tenant_id,
+        AuditLog.employee_id == employee_id
+    )
+    
+    if since:
+        query = query.filter(AuditLog.created_at >= since)
+    if until:
+        query = query.filter(AuditLog.created_at < until)
+    
+    return query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit).all()
+
 @router.put("/{employee_id}", response_model=EmployeeResponse)
 def update_employee(
     employee_id: int,
@@ -107,7 +257,10 @@ def update_employee(
     current_user: User = Depends(get_current_user)
 ):
     """Update an employee"""
-    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    employee = db.query(Employee).filter(
+        Employee.id == employee_id,
+        Employee.tenant_id == current_user.tenant_id
+    ).first()
     
     if not employee:
         raise HTTPException(
@@ -117,7 +270,10 @@ def update_employee(
     
     # Check if new email already exists (if email is being updated)
     if employee_data.email and employee_data.email != employee.email:
-        existing = db.query(Employee).filter(Employee.email == employee_data.email).first()
+        existing = db.query(Employee).filter(
+            Employee.email == employee_data.email,
+            Employee.tenant_id == current_user.tenant_id
+        ).first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -131,6 +287,15 @@ def update_employee(
     
     db.commit()
     db.refresh(employee)
+    snapshot = find_salary_snapshot(current_user.tenant_id)
+    if snapshot:
+        snapshot.upsert(
+            employee.id,
+            employee.salary,
+            employee.designation,
+            employee.is_active,
+            employee.updated_at
+        )
     
     return employee
 
@@ -142,7 +307,10 @@ def delete_employee(
     current_user: User = Depends(get_current_user)
 ):
     """Delete an employee (soft delete by default)"""
-    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    employee = db.query(Employee).filter(
+        Employee.id == employee_id,
+        Employee.tenant_id == current_user.tenant_id
+    ).first()
     
     if not employee:
         raise HTTPException(
@@ -154,9 +322,15 @@ def delete_employee(
         # Hard delete - permanently remove from database
         db.delete(employee)
         db.commit()
+        snapshot = find_salary_snapshot(current_user.tenant_id)
+        if snapshot:
+            snapshot.remove(employee_id)
         return {"message": "Employee permanently deleted"}
     else:
         # Soft delete - mark as inactive
         employee.is_active = False
         db.commit()
+        snapshot = find_salary_snapshot(current_user.tenant_id)
+        if snapshot:
+            snapshot.deactivate(employee_id, employee.updated_at)
         return {"message": "Employee deactivated successfully"}
\ No newline at end of file
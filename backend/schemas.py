@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
 from datetime import datetime
+import json
 
 # User Schemas
 class UserBase(BaseModel):
@@ -30,6 +31,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    tenant_id: Optional[str] = None
 
 # Employee Schemas
 class EmployeeBase(BaseModel):
@@ -64,3 +66,52 @@ class PaginatedEmployeeResponse(BaseModel):
     page_size: int
     total_pages: int
     employees: list[EmployeeResponse]
+
+# Salary Analytics
+class SalaryHistogram(BaseModel):
+    edges: list[float]
+    counts: list[int]
+
+class DesignationSalaryStats(BaseModel):
+    designation: str
+    count: int
+    payroll: float
+    mean: float
+    percentiles: dict[str, float]
+
+class DesignationRaise(BaseModel):
+    designation: str
+    percent: float
+    payroll_before: float
+    payroll_after: float
+
+class RaiseSimulation(BaseModel):
+    payroll_before: float
+    payroll_after: float
+    delta: float
+    by_designation: list[DesignationRaise]
+
+class SalaryAnalyticsResponse(BaseModel):
+    total_employees: int
+    payroll_total: float
+    histogram: SalaryHistogram
+    designations: list[DesignationSalaryStats]
+    raise_simulation: Optional[RaiseSimulation] = None
+
+# Audit Log
+class AuditLogResponse(BaseModel):
+    id: int
+    employee_id: int
+    actor: Optional[str]
+    action: str
+    changes: dict[str, list]
+    created_at: datetime
+
+    @field_validator("changes", mode="before")
+    @classmethod
+    def parse_changes(cls, value):
+        # Stored as JSON text
+        return json.loads(value) if isinstance(value, str) else value
+
+    class Config:
+        from_attributes = True
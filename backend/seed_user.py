@@ -1,4 +1,5 @@
-from database import SessionLocal, create_tables
+from database import SessionLocal
+from migrations import ensure_schema
 from models import User
 from passlib.context import CryptContext
 
@@ -8,7 +9,7 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 # Ensure tables exist
-create_tables()
+ensure_schema()
 
 db = SessionLocal()
 
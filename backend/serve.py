@@ -0,0 +1,124 @@
+"""
+Production server: gunicorn master with uvicorn workers.
+
+The app is preloaded in the master so workers fork with modules already
+imported, and pending migrations run once there instead of per worker.
+Each worker disposes the inherited SQLAlchemy pool after fork so no DB
+connection is shared between processes.
+
+Usage:
+    python serve.py start [--workers N] [--port 8000] [--pid-file serve.pid]
+    python serve.py reload [--pid-file serve.pid]
+
+``reload`` is a zero-downtime rolling restart: the running master is
+re-executed with the new code (USR2), and once the new master is up the
+old one is shut down gracefully (TERM), letting in-flight requests finish.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+
+def default_workers() -> int:
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def post_fork(server, worker):
+    from database import engine
+
+    # Drop connections inherited from the master without closing them,
+    # the master still owns the underlying sockets
+    engine.dispose(close=False)
+
+
+def start(args):
+    from gunicorn.app.base import BaseApplication
+
+    from migrations import ensure_schema
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in {
+                "bind": f"{args.host}:{args.port}",
+                "workers": args.workers,
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "preload_app": True,
+                "keepalive": args.keepalive,
+                "backlog": args.backlog,
+                "timeout": args.timeout,
+                "graceful_timeout": args.graceful_timeout,
+                "pidfile": args.pid_file,
+                "post_fork": post_fork,
+            }.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    ensure_schema()
+    Server().run()
+
+
+def read_pid(pid_file: str):
+    try:
+        with open(pid_file) as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def reload(args):
+    old_pid = read_pid(args.pid_file)
+    if old_pid is None:
+        sys.exit(f"No running server found in {args.pid_file}")
+
+    os.kill(old_pid, signal.SIGUSR2)
+
+    # The new master writes "<pid-file>.2" once it has booted, and takes
+    # over the plain pid file after the old master exits
+    deadline = time.monotonic() + args.timeout
+    while time.monotonic() < deadline:
+        new_pid = read_pid(args.pid_file + ".2")
+        if new_pid is not None:
+            break
+        time.sleep(0.2)
+    else:
+        sys.exit("New server did not start, old server left running")
+
+    # Give the new workers time to boot before the old ones stop accepting
+    time.sleep(args.settle)
+    os.kill(old_pid, signal.SIGTERM)
+    print(f"Reloaded: master {old_pid} -> {new_pid}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the EMS API in production mode")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    start_parser = subparsers.add_parser("start", help="Start the server")
+    start_parser.add_argument("--host", default="0.0.0.0")
+    start_parser.add_argument("--port", type=int, default=8000)
+    start_parser.add_argument("--workers", type=int, default=default_workers())
+    start_parser.add_argument("--keepalive", type=int, default=5, help="Keep-alive seconds")
+    start_parser.add_argument("--backlog", type=int, default=2048, help="Listen backlog")
+    start_parser.add_argument("--timeout", type=int, default=30, help="Worker timeout seconds")
+    start_parser.add_argument("--graceful-timeout", type=int, default=30)
+    start_parser.add_argument("--pid-file", default="serve.pid")
+    start_parser.set_defaults(handler=start)
+
+    reload_parser = subparsers.add_parser("reload", help="Zero-downtime rolling restart")
+    reload_parser.add_argument("--pid-file", default="serve.pid")
+    reload_parser.add_argument("--timeout", type=int, default=60, help="Seconds to wait for the new master")
+    reload_parser.add_argument("--settle", type=float, default=2.0, help="Seconds before stopping the old master")
+    reload_parser.set_defaults(handler=reload)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
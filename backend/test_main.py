@@ -1,12 +1,20 @@
 
+import glob
+import os
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
+import migrations
 from main import app
 from database import get_db, Base
+from config import settings
 from models import User, Employee
-from auth import get_password_hash
+from analytics import invalidate_snapshots
+from audit import audit_writer
+from routes.auth import get_password_hash
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -21,15 +29,60 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+audit_writer.session_factory = TestingSessionLocal
 
 @pytest.fixture(scope="function")
 def test_db():
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    invalidate_snapshots()
+    # The writer thread is not running here, so events would leak into
+    # the next test's audit log
+    while not audit_writer.queue.empty():
+        audit_writer.queue.get_nowait()
+    for path in glob.glob(os.path.join(audit_writer.spill_dir, f"audit_spill.{os.getpid()}.*")):
+        os.remove(path)
 
 client = TestClient(app)
 
+class TestHealth:
+    def test_health_check(self, test_db):
+        """Test readiness probe reports database connectivity"""
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json()["database"] == "ok"
+    
+    def test_health_check_database_down(self, test_db):
+        """Test readiness probe returns 503 when the database is unreachable"""
+        class UnreachableSession:
+            def execute(self, *args, **kwargs):
+                raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+        
+        app.dependency_overrides[get_db] = lambda: UnreachableSession()
+        try:
+            response = client.get("/health")
+        finally:
+            app.dependency_overrides[get_db] = override_get_db
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Database unavailable"
+
+class TestMigrations:
+    def test_concurrent_migrate(self, monkeypatch):
+        """Test workers migrating a fresh database at once all succeed, leaving one version row"""
+        monkeypatch.setattr(migrations, "engine", engine)
+        try:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                versions = list(pool.map(lambda _: migrations.migrate(), range(4)))
+            assert versions == [migrations.SCHEMA_VERSION] * 4
+            with engine.connect() as connection:
+                rows = connection.execute(text("SELECT id, version FROM schema_version")).all()
+            assert rows == [(1, migrations.SCHEMA_VERSION)]
+        finally:
+            Base.metadata.drop_all(bind=engine)
+            with engine.begin() as connection:
+                connection.execute(text("DROP TABLE IF EXISTS schema_version"))
+
 class TestAuthentication:
     def test_register_user(self, test_db):
         """Test user registration"""
@@ -149,6 +202,28 @@ class TestEmployees:
         assert response.json()["name"] == "John Doe"
         assert response.json()["email"] == "john@example.com"
     
+    def test_create_duplicate_employee(self, test_db, auth_token):
+        """Test creating an employee with an existing email"""
+        payload = {
+            "name": "John Doe",
+            "email": "john@example.com",
+            "designation": "Software Engineer",
+            "salary": 75000.00
+        }
+        client.post(
+            "/employees",
+            json=payload,
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        # Duplicate email is rejected by the unique constraint
+        response = client.post(
+            "/employees",
+            json=payload,
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 400
+        assert "already exists" in response.json()["detail"]
+    
     def test_get_employees(self, test_db, auth_token):
         """Test getting employees list"""
         # Create employee
@@ -171,6 +246,69 @@ class TestEmployees:
         assert response.json()["total"] >= 1
         assert len(response.json()["employees"]) >= 1
     
+    def test_get_employees_sparse_fields(self, test_db, auth_token):
+        """Test narrowing the employees list with a sparse fieldset"""
+        client.post(
+            "/employees",
+            json={
+                "name": "John Doe",
+                "email": "john@example.com",
+                "designation": "Software Engineer",
+                "salary": 75000.00
+            },
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        response = client.get(
+            "/employees",
+            params={"fields": "name,email,designation"},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200
+        assert response.json()["employees"][0] == {
+            "name": "John Doe",
+            "email": "john@example.com",
+            "designation": "Software Engineer"
+        }
+        
+        # Unknown fields are rejected
+        response = client.get(
+            "/employees",
+            params={"fields": "name,password"},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 400
+    
+    def test_get_employees_compressed(self, test_db, auth_token):
+        """Test list responses are gzip compressed above the size threshold"""
+        for i in range(20):
+            client.post(
+                "/employees",
+                json={
+                    "name": f"Employee {i}",
+                    "email": f"employee{i}@example.com",
+                    "designation": "Software Engineer",
+                    "salary": 75000.00
+                },
+                headers={"Authorization": f"Bearer {auth_token}"}
+            )
+        response = client.get(
+            "/employees",
+            params={"page_size": 20},
+            headers={"Authorization": f"Bearer {auth_token}", "Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()["employees"]) == 20
+        
+        # The highest q-value wins, not the first supported coding
+        response = client.get(
+            "/employees",
+            params={"page_size": 20},
+            headers={"Authorization": f"Bearer {auth_token}", "Accept-Encoding": "br;q=0.5, gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()["employees"]) == 20
+    
     def test_get_employee_by_id(self, test_db, auth_token):
         """Test getting employee by ID"""
         # Create employee
@@ -245,6 +383,167 @@ class TestEmployees:
         assert response.status_code == 200
         assert "deactivated" in response.json()["message"]
     
+    def test_salary_analytics(self, test_db, auth_token):
+        """Test salary analytics with a raise simulation"""
+        for i, (designation, salary) in enumerate([
+            ("Engineer", 70000.00),
+            ("Engineer", 90000.00),
+            ("Manager", 120000.00)
+        ]):
+            client.post(
+                "/employees",
+                json={
+                    "name": f"Employee {i}",
+                    "email": f"employee{i}@example.com",
+                    "designation": designation,
+                    "salary": salary
+                },
+                headers={"Authorization": f"Bearer {auth_token}"}
+            )
+        
+        response = client.get(
+            "/employees/analytics",
+            params={"bins": 4, "raises": ["Engineer:10"]},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_employees"] == 3
+        assert data["payroll_total"] == 280000.00
+        assert sum(data["histogram"]["counts"]) == 3
+        engineers = next(d for d in data["designations"] if d["designation"] == "Engineer")
+        assert engineers["percentiles"]["p50"] == 80000.00
+        assert data["raise_simulation"]["delta"] == pytest.approx(16000.00)
+        
+        for bad_raise in ["Engineer", "Engineer:ten", "Engineer:nan", "Engineer:inf"]:
+            response = client.get(
+                "/employees/analytics",
+                params={"raises": [bad_raise]},
+                headers={"Authorization": f"Bearer {auth_token}"}
+            )
+            assert response.status_code == 400
+    
+    def test_salary_analytics_sees_other_workers_writes(self, test_db, auth_token, monkeypatch):
+        """Test analytics pick up writes that bypassed this process's snapshot"""
+        monkeypatch.setattr(settings, "ANALYTICS_STALENESS_CHECK_INTERVAL", 0)
+        client.post(
+            "/employees",
+            json={
+                "name": "John Doe",
+                "email": "john@example.com",
+                "designation": "Engineer",
+                "salary": 70000.00
+            },
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        
+        def total_employees():
+            response = client.get(
+                "/employees/analytics",
+                params={"include_inactive": True},
+                headers={"Authorization": f"Bearer {auth_token}"}
+            )
+            return response.json()["total_employees"]
+        
+        assert total_employees() == 1
+        
+        # Another worker inserts, then hard deletes, through its own session
+        db = TestingSessionLocal()
+        employee = Employee(
+            name="Jane Doe",
+            email="jane@example.com",
+            designation="Manager",
+            salary=120000.00
+        )
+        db.add(employee)
+        db.commit()
+        assert total_employees() == 2
+        
+        db.delete(employee)
+        db.commit()
+        db.close()
+        assert total_employees() == 1
+    
+    def test_tenant_isolation(self, test_db, auth_token):
+        """Test employees are only visible within the creating tenant"""
+        create_response = client.post(
+            "/employees",
+            json={
+                "name": "John Doe",
+                "email": "john@example.com",
+                "designation": "Software Engineer",
+                "salary": 75000.00
+            },
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        employee_id = create_response.json()["id"]
+        
+        # User in another tenant
+        db = TestingSessionLocal()
+        db.add(User(
+            username="otheruser",
+            email="other@example.com",
+            hashed_password=get_password_hash("testpass123"),
+            tenant_id="other"
+        ))
+        db.commit()
+        db.close()
+        other_token = client.post(
+            "/auth/login",
+            json={
+                "username": "otheruser",
+                "password": "testpass123"
+            }
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {other_token}"}
+        
+        assert client.get("/employees", headers=headers).json()["total"] == 0
+        assert client.get(f"/employees/{employee_id}", headers=headers).status_code == 404
+        # Same email is allowed in a different tenant
+        response = client.post(
+            "/employees",
+            json={
+                "name": "John Doe",
+                "email": "john@example.com",
+                "designation": "Software Engineer",
+                "salary": 75000.00
+            },
+            headers=headers
+        )
+        assert response.status_code == 201
+    
+    def test_employee_audit_log(self, test_db, auth_token):
+        """Test create and update are recorded in the audit log"""
+        create_response = client.post(
+            "/employees",
+            json={
+                "name": "John Doe",
+                "email": "john@example.com",
+                "designation": "Software Engineer",
+                "salary": 75000.00
+            },
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        employee_id = create_response.json()["id"]
+        client.put(
+            f"/employees/{employee_id}",
+            json={"salary": 85000.00},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        
+        # Audit events are written in the background; flush them now
+        audit_writer.flush()
+        
+        response = client.get(
+            f"/employees/{employee_id}/audit",
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200
+        entries = response.json()
+        assert [entry["action"] for entry in entries] == ["update", "create"]
+        assert entries[0]["actor"] == "testuser"
+        assert entries[0]["changes"] == {"salary": [75000.00, 85000.00]}
+    
     def test_unauthorized_access(self, test_db):
         """Test accessing protected route without token"""
         response = client.get("/employees")
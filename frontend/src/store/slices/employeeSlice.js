@@ -32,7 +32,7 @@ export const fetchEmployees = createAsyncThunk(
   'employees/fetchEmployees',
   async (_, { rejectWithValue }) => {
     try {
-      const response = await api.get('/employees?page=1&page_size=100');
+      const response = await api.get('/employees?page=1&page_size=100&fields=id,name,email,designation,salary,is_active');
       return response.data.employees;
     } catch (error) {
       return rejectWithValue(error.response?.data?.detail || 'Failed to fetch employees');